@@ -2,10 +2,48 @@ import streamlit as st
 import pandas as pd
 import sqlite3
 import os
+import math
+from pathlib import Path
+from datetime import datetime, timedelta, timezone
 import streamlit.components.v1 as components
 
+from db import open_db
+
 # Configuration
 DB_PATH = "articles.db"
+PAGE_SIZE_OPTIONS = [20, 50, 100]
+
+# Executive summary sections as (title, executive_summaries column)
+SUMMARY_SECTIONS = [
+    ("1. What's new today", 'whats_new_today'),
+    ("2. The AI Daily Brief Summary", 'daily_brief_summary'),
+    ("3. Key Takeaways", 'key_takeaways'),
+]
+
+# Daily pipeline run: 15:15:00 UTC (8:15 AM MST)
+UPDATE_HOUR_UTC = 15
+UPDATE_MINUTE_UTC = 15
+
+# Countdown widget; the target is computed server-side so the script only ticks
+TIMER_HTML = """
+<div style="font-family: sans-serif; text-align: center; padding: 12px; background-color: #1e1e24; color: #ffffff; border-radius: 8px; border: 1px solid #333333; margin-bottom: 20px; box-shadow: 0 4px 6px rgba(0,0,0,0.1);">
+    <span style="font-size: 1.1em; font-weight: 500;">Next Autonomous Update: </span>
+    <span id="countdown" style="font-family: monospace; font-size: 1.25em; font-weight: bold; color: #00ffcc;">Calculating...</span>
+</div>
+<script>
+    let target = __TARGET_MS__;
+    const el = document.getElementById("countdown");
+    const pad = (n) => String(n).padStart(2, "0");
+    function tick() {
+        // Roll over to the next daily run once this one passes, without waiting for a rerun
+        while (target <= Date.now()) target += 86400000;
+        const t = Math.floor((target - Date.now()) / 1000);
+        el.innerText = pad(Math.floor(t / 3600)) + "h " + pad(Math.floor(t % 3600 / 60)) + "m " + pad(t % 60) + "s";
+    }
+    tick();
+    setInterval(tick, 1000);
+</script>
+"""
 
 # Page setup
 st.set_page_config(
@@ -15,16 +53,44 @@ st.set_page_config(
 )
 
 
+def row_value(row, name, default):
+    """Return a row field, or default when it is missing, empty or null (None/NaN/pd.NA)."""
+    value = getattr(row, name, None)
+    return value if pd.notna(value) and value != "" else default
+
+
+def add_audio_exists(df):
+    """Flag rows whose audio_path points at a file on disk, once per cached load."""
+    df['audio_exists'] = df['audio_path'].apply(lambda p: isinstance(p, str) and os.path.exists(p))
+    return df
+
+
+def tag_filter_clause(tags):
+    """Build the WHERE clause and parameters for processed articles, optionally limited to tags."""
+    clause = "WHERE processed = 1"
+    if tags:
+        clause += f" AND industry_tag IN ({','.join('?' * len(tags))})"
+    return clause, list(tags)
+
+
 @st.cache_data(ttl=60) # Cache the function's return value for 60 seconds
-def load_data():
-    """Connect to the database and retrieve processed articles."""
+def load_articles(tags, limit, offset):
+    """
+    Retrieve one page of processed articles, filtered by industry tag in SQL.
+    `tags` is a tuple so st.cache_data can hash it as part of the cache key.
+    """
     try:
-        conn = sqlite3.connect(DB_PATH)
-        # Query only processed rows
-        query = "SELECT * FROM articles WHERE processed = 1"
-        df = pd.read_sql_query(query, conn)
+        conn = open_db(DB_PATH, readonly=True)
+        where, params = tag_filter_clause(tags)
+        # Only the columns the feed renders (raw_text can hold full transcripts and is never displayed)
+        query = (
+            "SELECT id, title, url, industry_tag, summary, audio_path FROM articles "
+            f"{where} ORDER BY rowid DESC LIMIT ? OFFSET ?"
+        )
+        df = pd.read_sql_query(query, conn, params=params + [limit, offset])
         conn.close()
-        return df
+        # Arrow-backed string columns are more compact than object dtype and filter in C
+        return add_audio_exists(df).convert_dtypes(dtype_backend="pyarrow")
     except sqlite3.Error as e:
         st.error(f"Database error: {e}")
         return pd.DataFrame() # Return empty DataFrame on error
@@ -33,68 +99,110 @@ def load_data():
         return pd.DataFrame()
 
 
+@st.cache_data(ttl=60)
+def load_tag_counts():
+    """
+    Count processed articles per industry tag (None for untagged) in a single
+    aggregate query. The tag list, the total and the filtered counts used for
+    paging are all derived from this one cached result.
+    """
+    try:
+        conn = open_db(DB_PATH, readonly=True)
+        rows = conn.execute(
+            "SELECT industry_tag, COUNT(*) FROM articles "
+            "WHERE processed = 1 GROUP BY industry_tag ORDER BY industry_tag"
+        ).fetchall()
+        conn.close()
+        return dict(rows)
+    except sqlite3.Error as e:
+        st.error(f"Database error: {e}")
+        return {}
+
+
 @st.cache_data(ttl=60)
 def load_executive_summary():
-    """Retrieve the latest executive summary from the database."""
+    """Retrieve the latest executive summary from the database as a dict, or None if there is none."""
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = open_db(DB_PATH, readonly=True)
+        conn.row_factory = sqlite3.Row
         query = "SELECT * FROM executive_summaries ORDER BY generated_at DESC LIMIT 1"
-        df = pd.read_sql_query(query, conn)
+        row = conn.execute(query).fetchone()
         conn.close()
-        return df
     except sqlite3.Error:
         # Table might not exist yet or other DB error
-        return pd.DataFrame()
+        return None
     except Exception as e:
         st.error(f"Error loading executive summary: {e}")
-        return pd.DataFrame()
+        return None
+    if row is None:
+        return None
+    summary = dict(row)
+    audio_path = summary.get('audio_path')
+    summary['audio_exists'] = isinstance(audio_path, str) and os.path.exists(audio_path)
+    return summary
 
 @st.cache_data(ttl=60)
 def load_all_executive_summaries():
     """Retrieve all historical executive summaries from the database."""
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = open_db(DB_PATH, readonly=True)
         query = "SELECT * FROM executive_summaries ORDER BY generated_at DESC"
         df = pd.read_sql_query(query, conn)
         conn.close()
-        return df
+        return add_audio_exists(df)
     except:
         return pd.DataFrame()
 
-def display_countdown_timer():
-    """Injects a live Javascript timer counting down to the next 11:00 UTC."""
-    timer_html = """
-    <div style="font-family: sans-serif; text-align: center; padding: 12px; background-color: #1e1e24; color: #ffffff; border-radius: 8px; border: 1px solid #333333; margin-bottom: 20px; box-shadow: 0 4px 6px rgba(0,0,0,0.1);">
-        <span style="font-size: 1.1em; font-weight: 500;">Next Autonomous Update: </span>
-        <span id="countdown" style="font-family: monospace; font-size: 1.25em; font-weight: bold; color: #00ffcc;">Calculating...</span>
-    </div>
-    <script>
-        function updateTimer() {
-            const now = new Date();
-            let nextUpdate = new Date();
-            // Set to exactly 15:15:00 UTC (8:15 AM MST)
-            nextUpdate.setUTCHours(15, 15, 0, 0);
-            
-            // If it's already past 11:00 UTC today, the next update is tomorrow
-            if (now > nextUpdate) {
-                nextUpdate.setUTCDate(nextUpdate.getUTCDate() + 1);
-            }
-            
-            const diff = nextUpdate - now;
-            const hours = Math.floor(diff / (1000 * 60 * 60));
-            const minutes = Math.floor((diff % (1000 * 60 * 60)) / (1000 * 60));
-            const seconds = Math.floor((diff % (1000 * 60)) / 1000);
-            
-            document.getElementById("countdown").innerText = 
-                hours.toString().padStart(2, '0') + "h " + 
-                minutes.toString().padStart(2, '0') + "m " + 
-                seconds.toString().padStart(2, '0') + "s";
-        }
-        setInterval(updateTimer, 1000);
-        updateTimer();
-    </script>
+@st.cache_data(max_entries=2)
+def load_audio(path, mtime):
+    """
+    Read an audio file from disk, keyed on (path, mtime). Only the current edition's player,
+    rendered on every rerun, goes through here; two entries cover it and the one it replaced.
+    """
+    return Path(path).read_bytes()
+
+def display_audio(path, cache_bytes=False):
+    """
+    Render a local MP3. With cache_bytes the file is read once per version and later reruns
+    are served from memory; other players hand Streamlit the path so they don't churn the cache.
+    """
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        # Removed since the cached audio_exists check; nothing to play
+        return
+    st.audio(load_audio(path, mtime) if cache_bytes else path, format="audio/mpeg")
+
+def next_update_timestamp():
+    """Return the next scheduled pipeline run (UPDATE_HOUR_UTC:UPDATE_MINUTE_UTC) as epoch milliseconds."""
+    now = datetime.now(timezone.utc)
+    next_update = now.replace(hour=UPDATE_HOUR_UTC, minute=UPDATE_MINUTE_UTC, second=0, microsecond=0)
+    # If it's already past today's run, the next update is tomorrow
+    if now > next_update:
+        next_update += timedelta(days=1)
+    return int(next_update.timestamp() * 1000)
+
+@st.cache_data(max_entries=2)
+def build_timer_html(target_ms):
     """
-    components.html(timer_html, height=80)
+    Build the countdown widget for a fixed target time. The markup only changes
+    once a day, so reruns hand Streamlit an identical string and the iframe is reused.
+    """
+    return TIMER_HTML.replace("__TARGET_MS__", str(target_ms))
+
+def display_countdown_timer():
+    """Injects a live Javascript timer counting down to the next scheduled update."""
+    components.html(build_timer_html(next_update_timestamp()), height=80)
+
+
+def display_summary_sections(summary, heading):
+    """Render the three executive summary sections of a summary mapping, using `heading` for titles."""
+    for index, (title, column) in enumerate(SUMMARY_SECTIONS):
+        if index:
+            st.divider()
+        heading(title)
+        value = summary.get(column)
+        st.write(value if pd.notna(value) and value != "" else 'No data.')
 
 
 def main():
@@ -105,10 +213,11 @@ def main():
     display_countdown_timer()
     
     # Load data
-    df = load_data()
-    exec_summary_df = load_executive_summary()
+    tag_counts = load_tag_counts()
+    total_articles = sum(tag_counts.values())
+    exec_summary = load_executive_summary()
 
-    if df.empty:
+    if total_articles == 0:
         st.warning("No processed articles found in the database. Run the ingestion and distillation pipelines first.")
         return
 
@@ -117,29 +226,18 @@ def main():
 
     # --- TAB 1: Executive Summary ---
     with tab1:
-        if not exec_summary_df.empty:
-            summary_row = exec_summary_df.iloc[0]
-            generated_at = summary_row.get('generated_at', 'Unknown time')
+        if exec_summary:
+            generated_at = exec_summary.get('generated_at') or 'Unknown time'
             
             st.caption(f"Last Generated: {generated_at}")
             
-            audio_path = summary_row.get('audio_path')
-            if pd.notna(audio_path) and isinstance(audio_path, str):
-                if os.path.exists(audio_path):
-                    st.audio(audio_path, format="audio/mpeg")
-                else:
-                    st.warning("Audio file not found on disk.")
+            audio_path = exec_summary.get('audio_path')
+            if exec_summary['audio_exists']:
+                display_audio(audio_path, cache_bytes=True)
+            elif isinstance(audio_path, str):
+                st.warning("Audio file not found on disk.")
             
-            st.header("1. What's new today")
-            st.write(summary_row.get('whats_new_today', 'No data.'))
-            st.divider()
-            
-            st.header("2. The AI Daily Brief Summary")
-            st.write(summary_row.get('daily_brief_summary', 'No data.'))
-            st.divider()
-            
-            st.header("3. Key Takeaways")
-            st.write(summary_row.get('key_takeaways', 'No data.'))
+            display_summary_sections(exec_summary, st.header)
         else:
             st.info("No Executive Summary generated yet. Please run the `synthesizer.py` pipeline.")
 
@@ -149,40 +247,42 @@ def main():
         st.sidebar.header("Filter Source Feed")
         
         # Get unique industry tags for the multiselect
-        unique_tags = sorted([tag for tag in df['industry_tag'].unique() if pd.notna(tag)])
+        unique_tags = [tag for tag in tag_counts if tag is not None]
         
         selected_tags = st.sidebar.multiselect(
             "Select Industry Tags:",
             options=unique_tags,
             default=[] 
         )
+        tags = tuple(sorted(selected_tags))
+        matching_articles = sum(tag_counts.get(tag, 0) for tag in tags) if tags else total_articles
 
-        if selected_tags:
-            filtered_df = df[df['industry_tag'].isin(selected_tags)]
-        else:
-            filtered_df = df
+        # Only the current page is queried and rendered, so cost per rerun stays constant
+        page_size = st.sidebar.selectbox("Rows per page", PAGE_SIZE_OPTIONS, index=0)
+        page_count = max(1, math.ceil(matching_articles / page_size))
+        page = st.sidebar.number_input("Page", min_value=1, max_value=page_count, value=1, step=1)
+        page_df = load_articles(tags, page_size, (page - 1) * page_size)
 
-        st.sidebar.markdown(f"**Showing {len(filtered_df)} of {len(df)} raw articles.**")
+        st.sidebar.markdown(f"**Showing {matching_articles} of {total_articles} raw articles.**")
+        st.sidebar.caption(f"Page {page} of {page_count}")
 
-        if filtered_df.empty:
+        if page_df.empty:
              st.info("No articles match the selected filters.")
         else:
-             for index, row in filtered_df.iterrows():
+             for row in page_df.itertuples(index=False):
                  with st.container():
-                     title = row.get('title', 'Untitled')
-                     url = row.get('url', '#')
+                     title = row_value(row, 'title', 'Untitled')
+                     url = row_value(row, 'url', '#')
                      st.subheader(f"[{title}]({url})")
 
-                     tag = row.get('industry_tag', 'Uncategorized')
+                     tag = row_value(row, 'industry_tag', 'Uncategorized')
                      st.caption(f"Tag: {tag}")
 
-                     summary = row.get('summary', 'No summary available.')
+                     summary = row_value(row, 'summary', 'No summary available.')
                      st.markdown(summary)
 
-                     audio_path = row.get('audio_path')
-                     if pd.notna(audio_path) and isinstance(audio_path, str):
-                         if os.path.exists(audio_path):
-                             st.audio(audio_path, format="audio/mpeg")
+                     if row.audio_exists:
+                         display_audio(row.audio_path)
                      
                      st.markdown("---")
 
@@ -195,31 +295,22 @@ def main():
         if all_summaries_df.empty:
             st.info("No historical data available yet.")
         else:
-            # We skip the very first one since it's the current 'live' one shown in Tab 1
-            # But the user asked for an archive, so showing all of them or skipping the latest is an option.
-            # Let's show all of them.
-            for index, row in all_summaries_df.iterrows():
-                gen_date = row.get('generated_at', 'Unknown time')
+            # Every edition is listed, including the current one shown in Tab 1
+            for row in all_summaries_df.itertuples(index=False):
+                gen_date = row_value(row, 'generated_at', 'Unknown time')
                 
                 # Create an expander (clickable date) that reveals the content
                 with st.expander(f"📅 Daily Update: {gen_date}"):
-                    a_path = row.get('audio_path')
-                    if pd.notna(a_path) and isinstance(a_path, str):
-                        if os.path.exists(a_path):
-                            st.audio(a_path, format="audio/mpeg")
-                        else:
-                            st.caption("(Audio file not found for this archive entry)")
-                    
-                    st.subheader("1. What's new today")
-                    st.write(row.get('whats_new_today', 'No data.'))
-                    st.divider()
-                    
-                    st.subheader("2. The AI Daily Brief Summary")
-                    st.write(row.get('daily_brief_summary', 'No data.'))
-                    st.divider()
+                    a_path = row.audio_path
+                    # Expander bodies run on every rerun, so an edition's MP3 is only read
+                    # once its player is switched on, not for the whole archive each time
+                    if row.audio_exists:
+                        if st.toggle("🔊 Load audio", key=f"archive_audio_{row.id}"):
+                            display_audio(a_path)
+                    elif isinstance(a_path, str):
+                        st.caption("(Audio file not found for this archive entry)")
                     
-                    st.subheader("3. Key Takeaways")
-                    st.write(row.get('key_takeaways', 'No data.'))
+                    display_summary_sections(row._asdict(), st.subheader)
 
 if __name__ == "__main__":
     main()
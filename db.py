@@ -0,0 +1,56 @@
+"""
+Shared SQLite connection helper for the ingestion, distillation and dashboard
+code. Every connection is opened in WAL mode with a tuned PRAGMA set so the
+Streamlit readers and the pipeline writers don't serialize on the journal lock.
+"""
+
+import sqlite3
+from urllib.parse import quote
+
+# Applied to every new connection; journal_mode=WAL is persisted in the database file
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL;"
+    "PRAGMA synchronous=NORMAL;"
+    "PRAGMA busy_timeout=5000;"
+    "PRAGMA cache_size=-64000;"
+    "PRAGMA temp_store=memory;"
+    "PRAGMA mmap_size=268435456;"
+    "PRAGMA foreign_keys=ON;"
+)
+
+# Read-only connections can't (and needn't) set the journal mode or foreign keys
+READER_PRAGMAS = (
+    "PRAGMA busy_timeout=5000;"
+    "PRAGMA cache_size=-64000;"
+    "PRAGMA temp_store=memory;"
+    "PRAGMA mmap_size=268435456;"
+)
+
+
+def open_db(db_path: str = "articles.db", readonly: bool = False, **kwargs) -> sqlite3.Connection:
+    """
+    Opens a SQLite connection with WAL journaling and the tuned PRAGMAs applied.
+    With readonly=True the file is opened with mode=ro: the connection reads a WAL snapshot,
+    never takes the write lock, and raises sqlite3.OperationalError if the file is missing.
+    Extra keyword arguments (e.g. isolation_level) are passed to sqlite3.connect.
+    """
+    if readonly:
+        conn = sqlite3.connect(f"file:{quote(db_path)}?mode=ro", uri=True, **kwargs)
+        conn.executescript(READER_PRAGMAS)
+        return conn
+    conn = sqlite3.connect(db_path, **kwargs)
+    conn.executescript(PRAGMAS)
+    return conn
+
+
+def close_db(conn: sqlite3.Connection) -> None:
+    """
+    Closes a pipeline connection, running PRAGMA optimize first so SQLite
+    refreshes planner statistics for tables whose shape changed meaningfully.
+    """
+    try:
+        conn.execute("PRAGMA optimize")
+    except sqlite3.Error:
+        pass
+    finally:
+        conn.close()
@@ -6,7 +6,8 @@ them using the Google GenAI API. This module acts as the logical LLM core.
 import logging
 import os
 import sqlite3
-from typing import Any, Dict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Iterator, Tuple
 
 from google import genai
 from google.genai import types
@@ -14,6 +15,8 @@ from pydantic import BaseModel
 from tenacity import retry, wait_exponential, stop_after_attempt
 from dotenv import load_dotenv
 
+from db import close_db, open_db
+
 # Load custom .env file for the user's setup
 load_dotenv("API key.env")
 
@@ -24,6 +27,12 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Number of article updates accumulated per transaction before committing
+COMMIT_BATCH_SIZE = 20
+
+# Concurrent Gemini requests; the job is bound by network latency, not CPU
+MAX_WORKERS = 8
+
 
 class ArticleSummary(BaseModel):
     industry_tag: str
@@ -64,6 +73,86 @@ def generate_summary_and_category(client: genai.Client, text: str) -> ArticleSum
     return response.parsed
 
 
+def iter_article_updates(client: genai.Client, records: list) -> Iterator[Tuple[str, tuple]]:
+    """
+    Yields (sql, params) UPDATE statements for the given article records.
+    Gemini calls are dispatched concurrently through a thread pool and yielded
+    as they complete, so the caller can apply them on its own thread (sqlite3
+    connections are not shared across threads).
+    """
+    jobs = []
+    for record in records:
+        article_id = record["id"]
+        raw_text = record["raw_text"]
+        if not raw_text or not raw_text.strip():
+            logger.info("Article %s has no text. Marking as processed and skipping.", article_id)
+            yield "UPDATE articles SET processed = 1 WHERE id = ?", (article_id,)
+        else:
+            jobs.append((article_id, raw_text))
+
+    logger.info("Dispatching %d articles to Gemini across %d workers...", len(jobs), MAX_WORKERS)
+    executor = ThreadPoolExecutor(max_workers=MAX_WORKERS)
+    try:
+        # generate_summary_and_category keeps its own tenacity retry, so backoff stays per-request
+        futures = {
+            executor.submit(generate_summary_and_category, client, raw_text): article_id
+            for article_id, raw_text in jobs
+        }
+        for future in as_completed(futures):
+            article_id = futures[future]
+            try:
+                parsed_result = future.result()
+            except Exception as e:
+                logger.error("Failed to process article %s: %s", article_id, e)
+                continue
+            logger.info("Successfully completed distillation for article %s.", article_id)
+            yield (
+                """
+                UPDATE articles 
+                SET summary = ?, industry_tag = ?, processed = 1 
+                WHERE id = ?
+                """,
+                (parsed_result.summary, parsed_result.industry_tag, article_id),
+            )
+    finally:
+        # If the consumer stops early (generator closed, e.g. on a database error), queued
+        # Gemini calls are cancelled instead of being run and paid for only to be discarded
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def apply_updates(conn: sqlite3.Connection, updates: list) -> None:
+    """Applies (sql, params) updates in one short BEGIN IMMEDIATE transaction, rolling back on failure."""
+    cursor = conn.cursor()
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        for update_sql, update_params in updates:
+            cursor.execute(update_sql, update_params)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+
+def flush_updates(conn: sqlite3.Connection, updates: list) -> None:
+    """
+    Writes a batch of buffered updates in one transaction. If the batch fails, the updates are
+    retried one per transaction so a single bad row doesn't lose the rest of the batch's results.
+    """
+    try:
+        apply_updates(conn, updates)
+        logger.info("Committed a batch of %d article updates.", len(updates))
+        return
+    except sqlite3.Error as e:
+        logger.warning("Batch of %d article updates failed (%s); retrying row by row.", len(updates), e)
+
+    for update in updates:
+        try:
+            apply_updates(conn, [update])
+        except sqlite3.Error as e:
+            # Every update's last parameter is the article id
+            logger.error("Skipping update for article %s: %s", update[1][-1], e)
+
+
 def distillation_job(db_path: str = "articles.db") -> None:
     """
     Queries the database for unprocessed articles, uses the LLM logic to 
@@ -86,7 +175,7 @@ def distillation_job(db_path: str = "articles.db") -> None:
 
     try:
         client = genai.Client()
-        conn = sqlite3.connect(db_path)
+        conn = open_db(db_path, isolation_level=None)
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
@@ -104,45 +193,24 @@ def distillation_job(db_path: str = "articles.db") -> None:
             
         logger.info("Found %d unprocessed articles to distill.", len(records))
         
-        for record in records:
-            article_id = record["id"]
-            raw_text = record["raw_text"]
-            
-            if not raw_text or not raw_text.strip():
-                logger.info("Article %s has no text. Marking as processed and skipping.", article_id)
-                cursor.execute(
-                    "UPDATE articles SET processed = 1 WHERE id = ?",
-                    (article_id,)
-                )
-                conn.commit()
-                continue
-                
-            logger.info("Processing article %s...", article_id)
-            try:
-                # generate_summary_and_category automatically handles structured parsing and retries
-                parsed_result = generate_summary_and_category(client, raw_text)
+        # Completed updates are buffered in memory and written COMMIT_BATCH_SIZE at a time, so
+        # each commit pays the disk-sync cost once per batch and the write lock is only held
+        # while a batch is flushed, never while waiting on Gemini
+        pending_updates = []
+        for update in iter_article_updates(client, records):
+            pending_updates.append(update)
+            if len(pending_updates) >= COMMIT_BATCH_SIZE:
+                flush_updates(conn, pending_updates)
+                pending_updates = []
                 
-                # Update the database
-                cursor.execute(
-                    """
-                    UPDATE articles 
-                    SET summary = ?, industry_tag = ?, processed = 1 
-                    WHERE id = ?
-                    """,
-                    (parsed_result.summary, parsed_result.industry_tag, article_id)
-                )
-                conn.commit()
-                logger.info("Successfully completed distillation for article %s.", article_id)
-                
-            except Exception as e:
-                logger.error("Failed to process article %s: %s", article_id, e)
-                conn.rollback()
+        if pending_updates:
+            flush_updates(conn, pending_updates)
                 
     except sqlite3.Error as db_err:
         logger.error("Database error occurred: %s", db_err)
     finally:
         if 'conn' in locals() and conn:
-            conn.close()
+            close_db(conn)
         if os.path.exists(lock_file):
             os.remove(lock_file)
 
@@ -1,16 +1,25 @@
 import sqlite3
 import time
+import random
+import hashlib
+import threading
+from collections import OrderedDict
 import feedparser
 import requests
 import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
-from tenacity import retry, stop_after_attempt, wait_exponential
+from selectolax.lexbor import LexborHTMLParser
+from tenacity import retry, retry_if_not_exception_type, stop_after_attempt, wait_exponential
 from typing import Dict
 import youtube_transcript_api
 from datetime import datetime, timezone
-from pydantic import BaseModel, HttpUrl, Field
+from pydantic import BaseModel, HttpUrl, Field, TypeAdapter
 from typing import Optional
 
+from db import close_db, open_db
+
 # Feeds configuration
 FEEDS = [
     {"source": "TechCrunch AI", "url": "https://techcrunch.com/category/artificial-intelligence/feed/"},
@@ -33,6 +42,55 @@ FEEDS = [
 
 DB_NAME = "articles.db"
 
+# Fetched pages are reused from the http_cache table for this many seconds
+HTTP_CACHE_TTL = 3600
+
+# RSS summaries longer than this (as plain text) are treated as the full article
+FULL_SUMMARY_MIN_CHARS = 1500
+
+# Feeds are network-bound, so they are processed concurrently
+MAX_FEED_WORKERS = 8
+FEED_START_JITTER = 0.2 # Max seconds each feed worker waits before starting
+
+# Article pages within one feed are fetched concurrently (one per RSS entry taken)
+MAX_ENTRY_WORKERS = 5
+
+# Shared HTTP session so TCP/TLS connections are reused across fetches and threads.
+# Up to MAX_FEED_WORKERS * MAX_ENTRY_WORKERS requests can be in flight, so each
+# host keeps up to 32 keep-alive connections instead of opening and dropping extras.
+SESSION = requests.Session()
+SESSION.headers.update({
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+})
+_adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32)
+SESSION.mount("http://", _adapter)
+SESSION.mount("https://", _adapter)
+
+# Only HTML responses are downloaded, and bodies are truncated past this size
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml")
+MAX_RESPONSE_BYTES = 2 * 1024 * 1024
+
+# Article HTML parsing: boilerplate elements dropped before the body text is read
+_BOILERPLATE_TAGS = ["script", "style", "nav", "footer", "header", "aside", "form", "iframe"]
+
+# Extracted article text, LRU-cached by digest of the HTML it came from
+TEXT_CACHE_SIZE = 128
+_TEXT_CACHE: "OrderedDict[bytes, str]" = OrderedDict()
+_TEXT_CACHE_LOCK = threading.Lock()
+
+# Number of recent videos taken from the YouTube channel page
+MAX_YOUTUBE_VIDEOS = 5
+
+# Video IDs embedded in the YouTube channel page's JS data blob
+_VID_RE = re.compile(r'"videoId":"([^"]+)"')
+_YT_INITIAL_DATA = 'var ytInitialData = '
+
+# Title and publish date on a video watch page; <title> sits in the page head.
+# A literal '<' inside a title is always escaped, so [^<]* matches it without backtracking.
+_TITLE_RE = re.compile(r'<title>([^<]*)</title>')
+_PUB_RE = re.compile(r'"publishDate":"([^"]+)"')
+TITLE_SCAN_CHARS = 16384
+
 class ArticleSchema(BaseModel):
     id: str
     source: str
@@ -42,10 +100,20 @@ class ArticleSchema(BaseModel):
     summary: str
     published_at: str # ISO Format
     audio_path: Optional[str] = None
+
+# Built once; validate_python skips the per-call keyword-argument handling of ArticleSchema(...)
+_ARTICLE_VALIDATOR = TypeAdapter(ArticleSchema)
+
+def article_row(data: Dict[str, Optional[str]]) -> tuple:
+    """Validates one article's fields and returns them as an articles-table INSERT row.
+    The url is stored in its validated (normalized) form, as before.
+    """
+    article = _ARTICLE_VALIDATOR.validate_python(data)
+    return (article.id, article.source, article.title, str(article.url), article.raw_text, article.summary, None, article.audio_path, article.published_at, False)
     
 def setup_database() -> None:
     """Sets up the SQLite database and the required table."""
-    conn = sqlite3.connect(DB_NAME)
+    conn = open_db(DB_NAME)
     cursor = conn.cursor()
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS articles (
@@ -62,50 +130,186 @@ def setup_database() -> None:
             synthesized BOOLEAN NOT NULL DEFAULT 0
         )
     ''')
+    # Partial index backing the dashboard's "processed = 1" feed query
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_articles_processed
+        ON articles(processed) WHERE processed = 1
+    ''')
+    # Partial index backing distillation's "not yet processed" backlog query
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_articles_unprocessed
+        ON articles(id) WHERE processed = 0 OR processed IS NULL
+    ''')
+    # Backs the dashboard's tag filter and DISTINCT tag list
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_articles_tag ON articles(industry_tag)")
+    # Backs the synthesizer's "processed = 1 AND synthesized = 0" pending-articles query
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_articles_state ON articles(processed, synthesized)")
+    # Backs the synthesizer's latest-Daily-Brief lookup (source = ? AND published_at >= ?) and per-source scripts
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_articles_source_pub ON articles(source, published_at DESC)")
+    # Local cache of fetched pages so re-runs within HTTP_CACHE_TTL skip the network
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS http_cache (
+            url TEXT PRIMARY KEY,
+            fetched_at INTEGER NOT NULL,
+            body BLOB
+        )
+    ''')
+    cursor.execute("DELETE FROM http_cache WHERE fetched_at <= ?", (int(time.time()) - HTTP_CACHE_TTL,))
+    # Refresh planner statistics so the indexes above are picked up
+    cursor.execute("ANALYZE")
     conn.commit()
-    conn.close()
+    close_db(conn)
 
-@retry(stop=stop_after_attempt(5), wait=wait_exponential(multiplier=1, min=2, max=10))
-def fetch_url_content(url: str) -> str:
-    """Fetches the content of a URL with exponential backoff.
+def read_http_cache(url: str) -> Optional[str]:
+    """Returns the cached body for url if it was fetched within HTTP_CACHE_TTL, else None."""
+    try:
+        conn = open_db(DB_NAME)
+        try:
+            row = conn.execute(
+                "SELECT body FROM http_cache WHERE url = ? AND fetched_at > ?",
+                (url, int(time.time()) - HTTP_CACHE_TTL)
+            ).fetchone()
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        # Cache table missing (database not set up) or locked; fall through to the network
+        return None
+    return row[0].decode('utf-8') if row else None
+
+def write_http_cache(url: str, body: str) -> None:
+    """Stores a freshly fetched body in the http_cache table."""
+    try:
+        conn = open_db(DB_NAME)
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO http_cache (url, fetched_at, body) VALUES (?, ?, ?)",
+                (url, int(time.time()), body.encode('utf-8'))
+            )
+            conn.commit()
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        print(f"  Could not cache response for {url}: {e}")
+
+class UnsupportedContentError(Exception):
+    """Raised for responses that aren't HTML (PDFs, images, ...); these are not retried."""
+
+@retry(
+    stop=stop_after_attempt(5),
+    wait=wait_exponential(multiplier=1, min=2, max=10),
+    retry=retry_if_not_exception_type(UnsupportedContentError)
+)
+def download_url_content(url: str) -> str:
+    """Downloads the content of a URL with exponential backoff.
     Excludes certain content types that may not be raw HTML text, e.g. PDFs.
+    The body is streamed and capped at MAX_RESPONSE_BYTES.
     """
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
-    response = requests.get(url, headers=headers, timeout=15)
-    response.raise_for_status()
-    return response.text
+    with SESSION.get(url, timeout=15, stream=True) as response:
+        response.raise_for_status()
+        content_type = response.headers.get('Content-Type', '')
+        # Reject non-HTML before any of the body is downloaded
+        if content_type and not any(t in content_type for t in HTML_CONTENT_TYPES):
+            raise UnsupportedContentError(f"Unsupported content type {content_type!r} for {url}")
+        chunks = []
+        size = 0
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= MAX_RESPONSE_BYTES:
+                break
+        # Pages without a declared charset are decoded as UTF-8
+        encoding = response.encoding if 'charset' in content_type.lower() else 'utf-8'
+        return b''.join(chunks)[:MAX_RESPONSE_BYTES].decode(encoding or 'utf-8', errors='replace')
+
+def fetch_url_content(url: str) -> str:
+    """Fetches the content of a URL, served from the local http_cache when a fresh copy exists.
+    On a cache hit the network (and its retry chain) is skipped entirely.
+    """
+    cached = read_http_cache(url)
+    if cached is not None:
+        return cached
+    body = download_url_content(url)
+    write_http_cache(url, body)
+    return body
+
+def fetch_article_text(url: str) -> Optional[str]:
+    """Fetches an article page and extracts its text; returns None if the fetch fails or yields no text.
+    Safe to run from worker threads (the cache uses its own connections).
+    """
+    try:
+        print(f"  Fetching content for: {url}")
+        return extract_text_from_html(fetch_url_content(url)) or None
+    except Exception as e:
+        print(f"  Failed to fetch content for {url}: {e}")
+        return None
+
+def _parse_text_from_html(html_content: str) -> str:
+    """Extracts raw text from HTML content with selectolax's C (Lexbor) parser.
+    Boilerplate elements are stripped in place and only the <body> text is kept, one text node per line.
+    """
+    tree = LexborHTMLParser(html_content)
+    tree.strip_tags(_BOILERPLATE_TAGS)
+    if tree.body is None:
+        return ''
+    text = tree.body.text(separator='\n', strip=True)
+    # Whitespace-only nodes leave empty lines behind
+    return '\n'.join(line for line in text.split('\n') if line)
 
 def extract_text_from_html(html_content: str) -> str:
-    """Extracts raw text from HTML content using BeautifulSoup."""
-    soup = BeautifulSoup(html_content, 'html.parser')
-    for script_or_style in soup(["script", "style", "nav", "footer", "header"]):
-        script_or_style.decompose()
-    text = soup.get_text(separator=' ')
-    lines = (line.strip() for line in text.splitlines())
-    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-    return '\n'.join(chunk for chunk in chunks if chunk)
+    """Extracts raw text from HTML content, memoized on a BLAKE2b digest of the full document.
+    Identical payloads (the same page reached twice, or re-served from http_cache) are parsed once;
+    keying on the digest keeps the cache from holding on to multi-MB HTML strings.
+    """
+    digest = hashlib.blake2b(html_content.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+    with _TEXT_CACHE_LOCK:
+        if digest in _TEXT_CACHE:
+            _TEXT_CACHE.move_to_end(digest)
+            return _TEXT_CACHE[digest]
+    text = _parse_text_from_html(html_content)
+    with _TEXT_CACHE_LOCK:
+        _TEXT_CACHE[digest] = text
+        if len(_TEXT_CACHE) > TEXT_CACHE_SIZE:
+            _TEXT_CACHE.popitem(last=False)
+    return text
 
 def get_latest_youtube_videos(channel_url: str) -> list[str]:
     """Scrapes the YouTube channel videos page to extract recent video IDs."""
     try:
         html_content = fetch_url_content(channel_url)
-        # Find all video IDs in the JS window structure
-        video_ids = re.findall(r'"videoId":"([^"]+)"', html_content)
-        
-        # Deduplicate while preserving order
-        unique_vids = []
-        for vid in video_ids:
-            if vid not in unique_vids:
-                unique_vids.append(vid)
-                
-        return unique_vids[:5] # Return top 5 recent videos
+        # Scan only the ytInitialData <script> (bounds passed to finditer, so nothing is copied);
+        # fall back to the whole page if YouTube reshapes the payload
+        spans = []
+        start = html_content.find(_YT_INITIAL_DATA)
+        if start != -1:
+            end = html_content.find('</script>', start)
+            spans.append((start, end if end != -1 else len(html_content)))
+        spans.append((0, len(html_content)))
+
+        for pos, endpos in spans:
+            # Scan video IDs lazily, deduplicating while preserving order
+            # (dict keys keep insertion order), and stop once we have enough
+            unique_vids = {}
+            for match in _VID_RE.finditer(html_content, pos, endpos):
+                unique_vids[match.group(1)] = None
+                if len(unique_vids) == MAX_YOUTUBE_VIDEOS:
+                    break
+            if unique_vids:
+                return list(unique_vids) # Top 5 recent videos
+        return []
     except Exception as e:
         print(f"  Error fetching YouTube videos for {channel_url}: {e}")
         return []
 
 
+def existing_article_ids(cursor: sqlite3.Cursor, article_ids: list[str]) -> set[str]:
+    """Returns the subset of article_ids already stored, using a single query."""
+    if not article_ids:
+        return set()
+    placeholders = ",".join("?" * len(article_ids))
+    cursor.execute(f"SELECT id FROM articles WHERE id IN ({placeholders})", article_ids)
+    return {row[0] for row in cursor.fetchall()}
+
+
 def process_feed(feed_config: Dict[str, str], conn: sqlite3.Connection) -> None:
     """Processes a single RSS feed or YouTube channel, and saves to DB."""
     source_name = feed_config['source']
@@ -115,30 +319,33 @@ def process_feed(feed_config: Dict[str, str], conn: sqlite3.Connection) -> None:
     print(f"Processing feed: {source_name} ({feed_type})")
     
     cursor = conn.cursor()
+    # Validated rows are collected and inserted in one executemany/commit per feed
+    rows = []
 
     if feed_type == 'youtube':
          video_ids = get_latest_youtube_videos(feed_url)
          video_ids.reverse() # Insert oldest first so highest rowid = newest
+         existing_ids = existing_article_ids(cursor, [f"yt:{vid}" for vid in video_ids])
          for vid in video_ids:
              article_id = f"yt:{vid}"
              url = f"https://www.youtube.com/watch?v={vid}"
              
+             # Check if already exists before fetching anything
+             if article_id in existing_ids:
+                 print(f"  Skipping: '{vid}' (Already exists)")
+                 continue
+             
              # Fetch the video page to extract the real title
              try:
                  video_html = fetch_url_content(url)
-                 title_match = re.search(r'<title>(.*?)</title>', video_html)
+                 # The head is searched first; the full (~1MB) page only if the title isn't there
+                 title_match = _TITLE_RE.search(video_html, 0, TITLE_SCAN_CHARS) or _TITLE_RE.search(video_html)
                  title = title_match.group(1).replace(' - YouTube', '') if title_match else f"YouTube Video {vid}"
-                 pub_match = re.search(r'"publishDate":"([^"]+)"', video_html)
+                 pub_match = _PUB_RE.search(video_html)
                  published_at = pub_match.group(1) if pub_match else datetime.now(timezone.utc).isoformat()
              except Exception:
                  title = f"YouTube Video {vid}"
                  published_at = datetime.now(timezone.utc).isoformat()
-             
-             # Check if already exists
-             cursor.execute("SELECT 1 FROM articles WHERE id = ?", (article_id,))
-             if cursor.fetchone():
-                 print(f"  Skipping: '{title}' (Already exists)")
-                 continue
                  
              try:
                  print(f"  Fetching transcript for: {url}")
@@ -152,25 +359,17 @@ def process_feed(feed_config: Dict[str, str], conn: sqlite3.Connection) -> None:
                  summary = raw_text[:500] + "..." if len(raw_text) > 500 else raw_text
                  
                  # Validate strictly with Pydantic
-                 validated_article = ArticleSchema(
-                     id=article_id,
-                     source=source_name,
-                     title=title,
-                     url=url,
-                     raw_text=raw_text,
-                     summary=summary,
-                     published_at=published_at
-                 )
-                 
-                 cursor.execute('''
-                     INSERT INTO articles (id, source, title, url, raw_text, summary, industry_tag, published_at, processed)
-                     VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                 ''', (validated_article.id, validated_article.source, validated_article.title, str(validated_article.url), validated_article.raw_text, validated_article.summary, None, validated_article.published_at, False))
-                 conn.commit()
-                 print(f"  Saved: {title}")
+                 rows.append(article_row({
+                     'id': article_id,
+                     'source': source_name,
+                     'title': title,
+                     'url': url,
+                     'raw_text': raw_text,
+                     'summary': summary,
+                     'published_at': published_at
+                 }))
              except Exception as e:
                  print(f"  Error processing YouTube video '{vid}': {e}")
-                 conn.rollback()
 
     else:
         # Standard RSS Processing
@@ -183,7 +382,9 @@ def process_feed(feed_config: Dict[str, str], conn: sqlite3.Connection) -> None:
         entries = parsed_feed.entries[:5]
         # Reverse to insert oldest first so the newest article gets the highest rowid
         entries.reverse()
+        existing_ids = existing_article_ids(cursor, [entry.get('id', entry.get('link', '')) for entry in entries])
 
+        pending = []
         for entry in entries:
             title = entry.get('title', 'No Title')
             url = entry.get('link', '')
@@ -207,57 +408,87 @@ def process_feed(feed_config: Dict[str, str], conn: sqlite3.Connection) -> None:
                         audio_path = enc.get('href', '')
                         break
             
-            cursor.execute("SELECT 1 FROM articles WHERE id = ?", (article_id,))
-            if cursor.fetchone():
+            if article_id in existing_ids:
                 print(f"  Skipping: '{title}' (Already exists)")
                 continue
 
             raw_text = summary
+            needs_fetch = False
             
             if "ArXiv" not in source_name and audio_path is None:
-                try:
-                    print(f"  Fetching content for: {url}")
-                    html_content = fetch_url_content(url)
-                    extracted_text = extract_text_from_html(html_content)
-                    if extracted_text:
-                        raw_text = extracted_text
-                except Exception as e:
-                    print(f"  Failed to fetch content for {url}: {e}")
+                # Some feeds (e.g. BAIR, OpenAI Blog) ship the full article in the RSS summary;
+                # only fetch the page when the summary is a teaser
+                summary_text = BeautifulSoup(summary, 'lxml').get_text(' ', strip=True)
+                if len(summary_text) > FULL_SUMMARY_MIN_CHARS:
+                    raw_text = summary_text
+                else:
+                    needs_fetch = True
+
+            pending.append((article_id, title, url, summary, raw_text, published_at, audio_path, needs_fetch))
+
+        # Article pages are fetched concurrently; validation and the insert stay on this thread
+        fetch_urls = [item[2] for item in pending if item[7]]
+        with ThreadPoolExecutor(max_workers=MAX_ENTRY_WORKERS) as executor:
+            fetched = iter(list(executor.map(fetch_article_text, fetch_urls)))
+
+        for article_id, title, url, summary, raw_text, published_at, audio_path, needs_fetch in pending:
+            if needs_fetch:
+                raw_text = next(fetched) or raw_text
 
             try:
                 # Pydantic rigorous validation wrapper
-                validated_article = ArticleSchema(
-                    id=article_id,
-                    source=source_name,
-                    title=title,
-                    url=url,
-                    raw_text=raw_text,
-                    summary=summary,
-                    published_at=published_at,
-                    audio_path=audio_path
-                )
-                
-                cursor.execute('''
-                    INSERT INTO articles (id, source, title, url, raw_text, summary, industry_tag, audio_path, published_at, processed)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (validated_article.id, validated_article.source, validated_article.title, str(validated_article.url), validated_article.raw_text, validated_article.summary, None, validated_article.audio_path, validated_article.published_at, False))
-                conn.commit()
-                print(f"  Saved: {title}")
+                rows.append(article_row({
+                    'id': article_id,
+                    'source': source_name,
+                    'title': title,
+                    'url': url,
+                    'raw_text': raw_text,
+                    'summary': summary,
+                    'published_at': published_at,
+                    'audio_path': audio_path
+                }))
             except Exception as e:
-                print(f"  Error validating or saving '{title}': {e}")
-                conn.rollback()
+                print(f"  Error validating '{title}': {e}")
+
+    if rows:
+        try:
+            # One transaction per feed: the rows commit together, or the whole feed rolls back
+            with conn:
+                # INSERT OR IGNORE lets the PRIMARY KEY on id drop anything inserted concurrently since the check above
+                cursor.executemany('''
+                    INSERT OR IGNORE INTO articles (id, source, title, url, raw_text, summary, industry_tag, audio_path, published_at, processed)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', rows)
+            # rowcount sums the rows actually inserted; ignored duplicates don't count
+            inserted = cursor.rowcount
+            skipped = len(rows) - inserted
+            print(f"  Saved {inserted} articles from {source_name}" + (f" ({skipped} already stored)" if skipped else ""))
+        except sqlite3.Error as e:
+            print(f"  Error saving articles from {source_name}, rolled back the feed: {e}")
+
+def ingest_feed(feed_config: Dict[str, str]) -> None:
+    """Processes a single feed on its own SQLite connection (connections are not shared across threads)."""
+    # Small random stagger so concurrent workers don't hit hosts in lockstep
+    time.sleep(random.uniform(0, FEED_START_JITTER))
+    conn = open_db(DB_NAME)
+    try:
+        process_feed(feed_config, conn)
+    finally:
+        close_db(conn)
 
 def main() -> None:
     """Main execution function."""
     print("Setting up database...")
     setup_database()
     
-    conn = sqlite3.connect(DB_NAME)
-    for feed in FEEDS:
-        process_feed(feed, conn)
-        time.sleep(1) # Add a small delay between feeds
+    with ThreadPoolExecutor(max_workers=MAX_FEED_WORKERS) as executor:
+        futures = {executor.submit(ingest_feed, feed): feed['source'] for feed in FEEDS}
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                print(f"Error processing feed {futures[future]}: {e}")
         
-    conn.close()
     print("Ingestion complete.")
 
 if __name__ == "__main__":
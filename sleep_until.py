@@ -2,6 +2,9 @@ import sys
 import time
 from datetime import datetime, timezone
 
+# Longest single time.sleep() call while waiting, in seconds
+MAX_SLEEP_STEP = 60
+
 def wait_until(target_hour, target_minute):
     now = datetime.now(timezone.utc)
     target = now.replace(hour=target_hour, minute=target_minute, second=0, microsecond=0)
@@ -16,8 +19,11 @@ def wait_until(target_hour, target_minute):
     diff = (target - now).total_seconds()
     print(f"Holding runner execution... sleeping for {diff:.1f} seconds until {target.strftime('%H:%M:%S UTC')}.")
     
-    # Sleep until exactly the target UTC time
-    time.sleep(diff)
+    # Sleep until the target in bounded steps against a monotonic deadline, so an early or
+    # late wake-up is corrected on the next step and Ctrl-C/SIGTERM is handled promptly
+    deadline = time.monotonic() + diff
+    while (remaining := deadline - time.monotonic()) > 0:
+        time.sleep(min(remaining, MAX_SLEEP_STEP))
     print(f"Target time reached! Executing pipeline at {datetime.now(timezone.utc).strftime('%H:%M:%S UTC')}.")
 
 if __name__ == "__main__":
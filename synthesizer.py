@@ -1,14 +1,30 @@
+import asyncio
+import functools
+import hashlib
+import io
+import json
 import sqlite3
 import logging
+import math
 import os
+import re
+import shutil
+import tempfile
 from datetime import datetime
+from typing import Iterator, List, Optional, Tuple
 from dotenv import load_dotenv
 
 from google import genai
+from google.genai import errors as genai_errors
 from google.genai import types
+from google.genai.client import AsyncClient
+import httpx
+import openai
 from openai import OpenAI
 from pydantic import BaseModel
-from tenacity import retry, wait_exponential, stop_after_attempt
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential_jitter
+
+from db import close_db, open_db
 
 # Configure structured logging
 logging.basicConfig(
@@ -20,6 +36,37 @@ logger = logging.getLogger(__name__)
 # Load local API key
 load_dotenv("API key.env")
 
+# Executive reports are reused only for the same set of articles, for at most this long
+PROMPT_CACHE_TTL_DAYS = 2
+
+# Article bodies sent to the podcast prompt are cut to this many characters, keeping the
+# sentences most relevant to the title (BM25, standard k1/b; captions scored in word windows)
+RAW_TEXT_MAX_CHARS = 4000
+BM25_K1 = 1.5
+BM25_B = 0.75
+BM25_WINDOW_WORDS = 60
+_WORD_RE = re.compile(r'\w+')
+
+# The podcast script is voiced as it streams in: sentences are split on terminal punctuation
+# and grouped into TTS requests of at least this many characters
+_SENTENCE_END_RE = re.compile(r'(?<=[.!?])\s+')
+TTS_CHUNK_CHARS = 800
+
+# The OpenAI client (and its HTTP connection pool) is created once per process, on first use;
+# a forked worker should call get_openai_client.cache_clear(). The async Gemini client is
+# created per job instead: its connection pool is bound to the event loop it was first used on,
+# and every synthesis_job() call runs a new loop
+GEMINI_TIMEOUT_MS = 60_000
+GEMINI_HTTP_OPTIONS = types.HttpOptions(timeout=GEMINI_TIMEOUT_MS)
+
+# Retried API failures: rate limiting and transient server errors. A server-provided
+# Retry-After / RetryInfo delay is honored up to MAX_RETRY_AFTER_SECONDS
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+MAX_RETRY_AFTER_SECONDS = 120
+
+# Serializes the final report INSERT + synthesized UPDATE across concurrently running jobs
+_WRITE_LOCK = asyncio.Lock()
+
 
 class ExecutiveSummary(BaseModel):
     whats_new_today: str
@@ -27,8 +74,48 @@ class ExecutiveSummary(BaseModel):
     key_takeaways: str
 
 
+GEMINI_MODEL = 'gemini-2.5-flash'
+
+# Built once and reused for every report request and tenacity retry
+EXECUTIVE_REPORT_CONFIG = types.GenerateContentConfig(
+    response_schema=ExecutiveSummary,
+    response_mime_type="application/json",
+    temperature=0.2, # Lower temperature for more analytical/factual output
+)
+
+# Fixed instruction scaffold of the executive report prompt; the summaries batch is appended
+EXECUTIVE_REPORT_PROMPT = (
+    "You are an expert AI industry analyst. "
+    "Review the following collection of recent AI news summaries and synthesize them "
+    "into a highly concise, executive-level report designed to be read in under 3 minutes.\n\n"
+    "Please extract and construct the following three sections:\n"
+    "1. What's new today: The most important general news and trends.\n"
+    "2. The AI Daily Brief Summary: Find the text where the 'Source' is explicitly listed as 'The AI Daily Brief' and provide a comprehensive summary of that specific YouTube video transcript.\n"
+    "   - CRITICAL: You must categorize this summary by the different distinct topics discussed during the podcast episode.\n"
+    "   - CRITICAL: For each topic, create a main bullet point (e.g. '* **Topic Name:** Description').\n"
+    "   - CRITICAL: Directly underneath each topic bullet point, you MUST include an indented sub-bullet titled '* So what does this mean in plain English:' that explains the impact and provides potential industry applications.\n"
+    "3. Key takeaways: Actionable insights for professionals.\n\n"
+    "CRITICAL FORMATTING INSTRUCTION: You MUST format the content of EVERYTHING strictly as true markdown bulleted lists using asterisks (*).\n"
+    "You MUST include actual newline characters (\\n) between every single bullet point so they render correctly in the UI. Do NOT output a single paragraph with hyphens inside it. Every single item must be on its own line.\n\n"
+    "Raw Summaries Batch:\n"
+)
+
+# Fixed instruction scaffold of the podcast script prompt; the raw articles are appended
+PODCAST_SCRIPT_PROMPT = (
+    "You are an expert, engaging AI podcast host for 'AI Distillate'.\n"
+    "Your task is to take the following raw AI news articles and write a highly engaging, "
+    "conversational script that would take exactly 3 minutes to read out loud (about 450 words).\n\n"
+    "The script should sound like a solo host talking directly to the listener in a natural, relaxed tone. "
+    "Include natural conversational transitions (e.g., 'Now, shifting gears...', 'Interestingly...', 'Think about what this means...').\n"
+    "CRITICAL: Do NOT include any speaker labels (like 'Host:' or 'Speaker 1:'), sound effect cues (like '[Intro music fades]'), or any text that isn't meant to be spoken out loud. Write ONLY the pure spoken text.\n"
+    "Start with an energetic welcome framing this as the 'daily update' and dive straight into the top stories. Cover the macro trends, "
+    "model updates, and actionable takeaways.\n\n"
+    "Raw Articles:\n"
+)
+
+
 def setup_database(cursor: sqlite3.Cursor):
-    """Ensure the executive_summaries table exists with the proper schema."""
+    """Ensure the executive_summaries and prompt_cache tables exist with the proper schema."""
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS executive_summaries (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -39,185 +126,474 @@ def setup_database(cursor: sqlite3.Cursor):
             audio_path TEXT
         )
     """)
+    # Backs the dashboard's "latest summary" (ORDER BY generated_at DESC LIMIT 1) lookup
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_exec_generated_at ON executive_summaries(generated_at DESC)")
+    # Cache of executive reports, keyed by report_cache_key(); entries expire after PROMPT_CACHE_TTL_DAYS
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS prompt_cache (
+            prompt_hash TEXT PRIMARY KEY,
+            response TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute(
+        "DELETE FROM prompt_cache WHERE created_at < datetime('now', ?)",
+        (f"-{PROMPT_CACHE_TTL_DAYS} days",)
+    )
 
 
-@retry(
-    wait=wait_exponential(multiplier=2, min=4, max=65),
-    stop=stop_after_attempt(6)
+class EmptyResponseError(Exception):
+    """Raised when Gemini answers but returns nothing usable; a content issue, so never retried."""
+
+
+def _is_transient(exc: BaseException) -> bool:
+    """True for rate limits, server-side failures and network errors; other errors fail fast."""
+    if isinstance(exc, genai_errors.APIError):
+        return exc.code in RETRYABLE_STATUS_CODES
+    if isinstance(exc, openai.APIStatusError):
+        return exc.status_code in RETRYABLE_STATUS_CODES
+    return isinstance(exc, (httpx.TransportError, openai.APIConnectionError, asyncio.TimeoutError))
+
+
+def _retry_after_seconds(exc: BaseException) -> Optional[float]:
+    """Reads the server's requested delay from a Retry-After header or a Gemini RetryInfo detail."""
+    response = getattr(exc, 'response', None)
+    header = getattr(response, 'headers', {}).get('retry-after') if response is not None else None
+    if header:
+        try:
+            return float(header)
+        except ValueError:
+            pass
+    details = getattr(exc, 'details', None)
+    if isinstance(details, dict):
+        for detail in details.get('error', {}).get('details', []):
+            delay = detail.get('retryDelay') if isinstance(detail, dict) else None
+            if isinstance(delay, str) and delay.endswith('s'):
+                try:
+                    return float(delay[:-1])
+                except ValueError:
+                    pass
+    return None
+
+
+_BACKOFF = wait_exponential_jitter(initial=4, max=65)
+
+
+def _wait_for_retry(retry_state) -> float:
+    """Honors a server-provided retry delay (capped), else jittered exponential backoff."""
+    delay = _retry_after_seconds(retry_state.outcome.exception())
+    if delay is None:
+        return _BACKOFF(retry_state)
+    return min(delay, MAX_RETRY_AFTER_SECONDS)
+
+
+# Shared by the Gemini calls: only transient errors are retried, with jitter so concurrent jobs
+# sharing one quota don't retry in lockstep
+gemini_retry = retry(
+    retry=retry_if_exception(_is_transient),
+    wait=_wait_for_retry,
+    stop=stop_after_attempt(6),
 )
-def generate_executive_report(client: genai.Client, raw_summaries: str) -> ExecutiveSummary:
-    """Uses Gemini API to synthesize a single report from multiple summaries."""
-    prompt_text = (
-        "You are an expert AI industry analyst. "
-        "Review the following collection of recent AI news summaries and synthesize them "
-        "into a highly concise, executive-level report designed to be read in under 3 minutes.\n\n"
-        "Please extract and construct the following three sections:\n"
-        "1. What's new today: The most important general news and trends.\n"
-        "2. The AI Daily Brief Summary: Find the text where the 'Source' is explicitly listed as 'The AI Daily Brief' and provide a comprehensive summary of that specific YouTube video transcript.\n"
-        "   - CRITICAL: You must categorize this summary by the different distinct topics discussed during the podcast episode.\n"
-        "   - CRITICAL: For each topic, create a main bullet point (e.g. '* **Topic Name:** Description').\n"
-        "   - CRITICAL: Directly underneath each topic bullet point, you MUST include an indented sub-bullet titled '* So what does this mean in plain English:' that explains the impact and provides potential industry applications.\n"
-        "3. Key takeaways: Actionable insights for professionals.\n\n"
-        "CRITICAL FORMATTING INSTRUCTION: You MUST format the content of EVERYTHING strictly as true markdown bulleted lists using asterisks (*).\n"
-        "You MUST include actual newline characters (\\n) between every single bullet point so they render correctly in the UI. Do NOT output a single paragraph with hyphens inside it. Every single item must be on its own line.\n\n"
-        f"Raw Summaries Batch:\n{raw_summaries}"
-    )
 
-    response = client.models.generate_content(
-        model='gemini-2.5-flash',
+
+def executive_report_prompt(raw_summaries: str) -> str:
+    """Builds the executive report prompt: the fixed instruction scaffold followed by the summaries batch."""
+    return EXECUTIVE_REPORT_PROMPT + raw_summaries
+
+
+@gemini_retry
+async def generate_executive_report(client: AsyncClient, raw_summaries: str) -> ExecutiveSummary:
+    """Uses Gemini API (async client) to synthesize a single report from multiple summaries."""
+    prompt_text = executive_report_prompt(raw_summaries)
+
+    response = await client.models.generate_content(
+        model=GEMINI_MODEL,
         contents=prompt_text,
-        config=types.GenerateContentConfig(
-            response_schema=ExecutiveSummary,
-            response_mime_type="application/json",
-            temperature=0.2, # Lower temperature for more analytical/factual output
-        ),
+        config=EXECUTIVE_REPORT_CONFIG,
     )
     
     if not response.parsed:
-        raise ValueError("Failed to parse response from Gemini API")
+        raise EmptyResponseError("Failed to parse response from Gemini API")
         
     return response.parsed
 
 
-@retry(
-    wait=wait_exponential(multiplier=2, min=4, max=65),
-    stop=stop_after_attempt(6)
-)
-def generate_podcast_script(client: genai.Client, raw_text: str) -> str:
-    """Uses Gemini API to synthesize raw articles into a 3-minute podcast script."""
-    prompt_text = (
-        "You are an expert, engaging AI podcast host for 'AI Distillate'.\n"
-        "Your task is to take the following raw AI news articles and write a highly engaging, "
-        "conversational script that would take exactly 3 minutes to read out loud (about 450 words).\n\n"
-        "The script should sound like a solo host talking directly to the listener in a natural, relaxed tone. "
-        "Include natural conversational transitions (e.g., 'Now, shifting gears...', 'Interestingly...', 'Think about what this means...').\n"
-        "CRITICAL: Do NOT include any speaker labels (like 'Host:' or 'Speaker 1:'), sound effect cues (like '[Intro music fades]'), or any text that isn't meant to be spoken out loud. Write ONLY the pure spoken text.\n"
-        "Start with an energetic welcome framing this as the 'daily update' and dive straight into the top stories. Cover the macro trends, "
-        "model updates, and actionable takeaways.\n\n"
-        f"Raw Articles:\n{raw_text}"
-    )
+def report_cache_key(records: List[Tuple[str, str, str]]) -> str:
+    """
+    Returns the prompt_cache key for a batch of (source, title, summary) records: a SHA-256 over
+    the instruction scaffold and the records with whitespace collapsed and sorted, so the same
+    articles in a different order or with reflowed text map to the same entry.
+    """
+    blocks = sorted("\x1f".join(" ".join(str(field).split()) for field in record) for record in records)
+    return hashlib.sha256((EXECUTIVE_REPORT_PROMPT + "\x1e".join(blocks)).encode("utf-8")).hexdigest()
 
-    response = client.models.generate_content(
-        model='gemini-2.5-flash',
-        contents=prompt_text,
-    )
-    
-    if not response.text:
-        raise ValueError("Failed to generate podcast script from Gemini API")
-        
-    return response.text
 
+def _compress_raw(title: str, raw_text: Optional[str], max_chars: int = RAW_TEXT_MAX_CHARS) -> Optional[str]:
+    """
+    Shrinks an article body to about max_chars for the podcast prompt, keeping the lede plus the
+    sentences that score highest against the title (BM25), in their original order. Texts already
+    under budget are returned unchanged; with no title overlap this degrades to plain truncation.
+    """
+    if not isinstance(raw_text, str) or len(raw_text) <= max_chars:
+        return raw_text
+
+    # Sentences; unpunctuated runs (e.g. YouTube captions) are cut into fixed word windows
+    sentences = []
+    for sentence in _SENTENCE_END_RE.split(raw_text):
+        words = sentence.split()
+        for start in range(0, len(words), BM25_WINDOW_WORDS):
+            sentences.append(" ".join(words[start:start + BM25_WINDOW_WORDS]))
+
+    if not sentences:
+        # Over budget but no words at all (e.g. whitespace padding)
+        return raw_text[:max_chars]
+
+    query = set(_WORD_RE.findall(title.lower())) if isinstance(title, str) else set()
+    docs = [_WORD_RE.findall(sentence.lower()) for sentence in sentences]
+    n = len(docs)
+    avgdl = sum(len(doc) for doc in docs) / n or 1
+    df = {term: sum(1 for doc in docs if term in doc) for term in query}
+    idf = {term: math.log((n - df[term] + 0.5) / (df[term] + 0.5) + 1) for term in query}
+
+    def bm25(index: int) -> float:
+        doc = docs[index]
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * len(doc) / avgdl)
+        return sum(idf[term] * tf * (BM25_K1 + 1) / (tf + norm) for term in query if (tf := doc.count(term)))
+
+    # The lede always goes first; the rest in score order (ties keep document order)
+    ranked = [0] + sorted(range(1, n), key=lambda i: -bm25(i))
+    keep = set()
+    budget = max_chars
+    for index in ranked:
+        if len(sentences[index]) <= budget:
+            keep.add(index)
+            budget -= len(sentences[index]) + 1
+    return " ".join(sentences[i] for i in sorted(keep)) or raw_text[:max_chars]
+
+
+def _load_cached_report(db_path: str, prompt_hash: str) -> Optional[ExecutiveSummary]:
+    """Returns the stored report for an identical prompt, or None on a miss or database error."""
+    try:
+        conn = open_db(db_path, readonly=True)
+        try:
+            row = conn.execute("SELECT response FROM prompt_cache WHERE prompt_hash = ?", (prompt_hash,)).fetchone()
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        logger.warning(f"Prompt cache unavailable: {e}")
+        return None
+    return ExecutiveSummary.model_validate_json(row[0]) if row else None
+
+
+def _store_cached_report(db_path: str, prompt_hash: str, report: ExecutiveSummary) -> None:
+    """Stores a freshly generated report in prompt_cache; failures are logged, not raised."""
+    try:
+        conn = open_db(db_path)
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO prompt_cache (prompt_hash, response) VALUES (?, ?)",
+                (prompt_hash, report.model_dump_json())
+            )
+            conn.commit()
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        logger.warning(f"Could not cache executive report: {e}")
+
+
+async def cached_executive_report(client: AsyncClient, raw_summaries: str, prompt_hash: str, db_path: str) -> ExecutiveSummary:
+    """
+    Cache tier in front of generate_executive_report, keyed by report_cache_key() of the batch's
+    records: the same set of articles (e.g. a rerun after a failed TTS or commit step, in any
+    order) reuses the stored report instead of calling Gemini.
+    """
+    cached = await asyncio.to_thread(_load_cached_report, db_path, prompt_hash)
+    if cached is not None:
+        logger.info("Executive report served from prompt cache.")
+        return cached
+    report = await generate_executive_report(client, raw_summaries)
+    await asyncio.to_thread(_store_cached_report, db_path, prompt_hash, report)
+    return report
+
+
+@gemini_retry
+async def generate_podcast(client: AsyncClient, raw_text: str, audio_path: str) -> str:
+    """
+    Streams a 3-minute podcast script from Gemini and voices it with OpenAI TTS while it is
+    still being written. Complete sentences are grouped into ~TTS_CHUNK_CHARS requests that
+    start right away. Each request streams its MP3 into its own segment file in a scratch
+    directory next to audio_path; the segments are then appended in order to a .part file that
+    replaces audio_path only once every segment has been written. Returns the full script.
+    """
+    prompt_text = PODCAST_SCRIPT_PROMPT + raw_text
+    work_dir = tempfile.mkdtemp(prefix=".podcast-", dir=os.path.dirname(audio_path) or ".")
+    partial_path = os.path.join(work_dir, "podcast.mp3.part")
+
+    script_parts = []
+    tts_tasks = []
+    pending = "" # Complete sentences not yet sent to TTS
+    buffer = "" # Streamed text after the last sentence boundary
+
+    def synthesize(text: str) -> None:
+        # The OpenAI TTS call is blocking, so each chunk runs in a worker thread
+        segment_path = os.path.join(work_dir, f"segment_{len(tts_tasks):03d}.mp3")
+        task = asyncio.create_task(asyncio.to_thread(save_speech, text, segment_path))
+        tts_tasks.append((task, segment_path))
+
+    try:
+        async for chunk in await client.models.generate_content_stream(
+            model=GEMINI_MODEL,
+            contents=prompt_text,
+        ):
+            if not chunk.text:
+                continue
+            script_parts.append(chunk.text)
+            *sentences, buffer = _SENTENCE_END_RE.split(buffer + chunk.text)
+            for sentence in sentences:
+                pending = f"{pending} {sentence}" if pending else sentence
+                if len(pending) >= TTS_CHUNK_CHARS:
+                    synthesize(pending)
+                    pending = ""
+
+        tail = f"{pending} {buffer}".strip()
+        if tail:
+            synthesize(tail)
+        if not tts_tasks:
+            raise EmptyResponseError("Failed to generate podcast script from Gemini API")
 
-def generate_audio(script_text: str, output_path: str = "podcast.mp3") -> str:
-    """Uses OpenAI TTS to generate a highly natural human-like MP3 audio file."""
+        # tts-1 returns constant-bitrate MP3, so the segments can be joined byte for byte
+        with open(partial_path, "wb") as audio_file:
+            for task, segment_path in tts_tasks:
+                await task
+                with open(segment_path, "rb") as segment_file:
+                    shutil.copyfileobj(segment_file, audio_file)
+                os.remove(segment_path)
+        os.replace(partial_path, audio_path)
+    except BaseException:
+        for task, _ in tts_tasks:
+            task.cancel()
+        await asyncio.gather(*(task for task, _ in tts_tasks), return_exceptions=True)
+        raise
+    finally:
+        # Also removes segments a cancelled-but-running TTS thread is still writing
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return "".join(script_parts)
+
+
+@functools.cache
+def get_openai_client() -> OpenAI:
+    """Returns the process-wide OpenAI client, creating it on first use."""
     openai_api_key = os.environ.get("OPENAI_API_KEY")
     if not openai_api_key:
         raise ValueError("OPENAI_API_KEY environment variable is not set. Cannot generate natural audio.")
-        
-    openai_client = OpenAI(api_key=openai_api_key)
+    return OpenAI(api_key=openai_api_key)
+
+
+def iter_audio_bytes(script_text: str, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """
+    Streams OpenAI TTS MP3 bytes as they arrive, so a consumer (file, upload, player)
+    can start before synthesis finishes. The HTTP response is closed when the generator is.
+    """
+    openai_client = get_openai_client()
     
-    response = openai_client.audio.speech.create(
+    with openai_client.audio.speech.with_streaming_response.create(
         model="tts-1",
         voice="nova", # 'nova' is a very natural, engaging female voice.
-        input=script_text
+        input=script_text,
+        response_format="mp3"
+    ) as response:
+        yield from response.iter_bytes(chunk_size)
+
+
+def save_speech(text: str, path: str) -> None:
+    """
+    Uses OpenAI TTS to voice one chunk of the script as highly natural human-like MP3,
+    streaming the bytes from the response straight into the file at path.
+    """
+    with open(path, "wb") as audio_file:
+        for chunk in iter_audio_bytes(text):
+            audio_file.write(chunk)
+
+
+async def generate_report_and_audio(client: AsyncClient, raw_summaries: str, report_key: str, raw_text: str, audio_path: str, db_path: str) -> ExecutiveSummary:
+    """
+    Runs the executive report and the podcast concurrently; the podcast's TTS overlaps
+    with its own script generation and with the report if that is still in flight.
+    """
+    report_data, _ = await asyncio.gather(
+        cached_executive_report(client, raw_summaries, report_key, db_path),
+        generate_podcast(client, raw_text, audio_path)
     )
-    
-    response.stream_to_file(output_path)
-    return output_path
+    logger.info(f"Audio saved to {audio_path}")
+    return report_data
 
 
-def synthesis_job(db_path: str = "articles.db"):
+def _fetch_pending(db_path: str) -> Optional[Tuple[List[tuple], Optional[tuple]]]:
     """
-    Reads processed articles, generates a synthesized report,
-    and saves it to the executive_summaries table.
+    Ensures the schema and returns (unsynthesized processed articles, newest AI Daily Brief
+    from the past 24 hours or None) over short-lived connections, closed before any API call.
+    Each article is a plain (id, source, title, summary, raw_text) tuple.
+    Returns None if the articles table doesn't exist yet.
     """
+    conn = open_db(db_path, isolation_level=None)
+    try:
+        setup_database(conn.cursor())
+    finally:
+        conn.close()
+    
+    # The SELECT runs on a read-only connection, reading a WAL snapshot without ever
+    # waiting on a concurrent writer's transaction
+    conn = open_db(db_path, readonly=True)
+    all_records = []
+    ai_brief_record = None
     try:
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
-        setup_database(cursor)
-        
-        # 1. Fetch all processed raw articles that haven't been synthesized yet
+        # Fetch all processed raw articles that haven't been synthesized yet together with the
+        # newest AI Daily Brief from the past 24 hours (even if synthesized=1), in one statement;
+        # `kind` tells the two result sets apart
         try:
-            cursor.execute("SELECT id, source, title, summary, raw_text FROM articles WHERE processed = 1 AND synthesized = 0 ORDER BY rowid DESC")
-            all_records = cursor.fetchall()
-            
-            # Fetch the newest AI Daily Brief from the past 24 hours (even if synthesized=1)
-            cursor.execute("SELECT id, source, title, summary, raw_text FROM articles WHERE source = 'The AI Daily Brief' AND published_at >= datetime('now', '-24 hours') ORDER BY rowid DESC LIMIT 1")
-            ai_brief_record = cursor.fetchone()
+            cursor.execute("""
+                SELECT id, source, title, summary, raw_text, 0 AS kind, rowid AS rid
+                FROM articles WHERE processed = 1 AND synthesized = 0
+                UNION ALL
+                SELECT * FROM (
+                    SELECT id, source, title, summary, raw_text, 1, rowid FROM articles
+                    WHERE source = 'The AI Daily Brief' AND published_at >= datetime('now', '-24 hours')
+                    ORDER BY rowid DESC LIMIT 1
+                )
+                ORDER BY kind, rid DESC
+            """)
         except sqlite3.OperationalError:
             logger.error("Database table 'articles' does not exist.")
-            return
-            
-        if not all_records and not ai_brief_record:
-            logger.info("No processed articles found to synthesize.")
-            return
-            
-        # Combine records: all unsynthesized non-AI-Daily-Brief ones, PLUS the single newest 24hr AI Daily Brief
-        llm_records = []
-        for row in all_records:
-            if row['source'] != 'The AI Daily Brief':
-                llm_records.append(row)
-                
-        if ai_brief_record:
-            # Prevent duplicates if it happens to also be in all_records
-            if not any(r['id'] == ai_brief_record['id'] for r in llm_records):
-                llm_records.append(ai_brief_record)
-            
-        logger.info(f"Synthesizing {len(llm_records)} article summaries into an executive report...")
-        
-        # 2. Concatenate summaries for the text report, and raw text for the script
-        aggregated_summaries = "\n\n".join([f"Source: {row['source']}\nTitle: {row['title']}\nSummary: {row['summary']}" for row in llm_records])
-        aggregated_raw_text = "\n\n".join([f"Source: {row['source']}\nTitle: {row['title']}\nContent: {row['raw_text']}" for row in llm_records])
-        
-        if not aggregated_summaries.strip():
-            logger.info("Aggregated text is empty. Skipping synthesis.")
-            return
-            
-        # 3. Call LLM to generate the Executive Summary and Podcast Script
-        client = genai.Client()
+            return None
+        # Plain tuples straight off the cursor, split by `kind` as they stream in
+        for article_id, source, title, summary, raw_text, kind, _ in cursor:
+            record = (article_id, source, title, summary, raw_text)
+            if kind == 0:
+                all_records.append(record)
+            else:
+                ai_brief_record = record
+    finally:
+        close_db(conn)
+    
+    return all_records, ai_brief_record
+
+
+def _commit_results(db_path: str, report_data: ExecutiveSummary, audio_path: str, article_ids: List[str]) -> None:
+    """
+    Saves the executive summary and marks article_ids as synthesized on a fresh connection,
+    in one short transaction. BEGIN IMMEDIATE takes the write lock up front, so a concurrent
+    writer is waited out via busy_timeout instead of failing a lock upgrade mid-transaction.
+    """
+    conn = open_db(db_path, isolation_level=None)
+    try:
+        cursor = conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
         try:
-            logger.info("Generating text Executive Summary...")
-            report_data = generate_executive_report(client, aggregated_summaries)
-            
-            logger.info("Generating 3-minute Podcast Script (from raw text)...")
-            podcast_script = generate_podcast_script(client, aggregated_raw_text)
-            
-            logger.info("Generating Podcast MP3 Audio using OpenAI TTS...")
-            audio_file_path = f"podcast_{datetime.now().strftime('%Y%m%d_%H%M%S')}.mp3"
-            
-            generate_audio(podcast_script, audio_file_path)
-            logger.info(f"Audio saved to {audio_file_path}")
-            
-            # 4. Save everything to database
             cursor.execute(
                 """
                 INSERT INTO executive_summaries (whats_new_today, daily_brief_summary, key_takeaways, audio_path)
                 VALUES (?, ?, ?, ?)
                 """,
-                (report_data.whats_new_today, report_data.daily_brief_summary, report_data.key_takeaways, audio_file_path)
+                (report_data.whats_new_today, report_data.daily_brief_summary, report_data.key_takeaways, audio_path)
             )
             
-            # Mark ALL fetched articles (even older excluded ones) as synthesized
-            article_ids = [(row['id'],) for row in all_records]
-            if ai_brief_record and ai_brief_record['id'] not in [row['id'] for row in all_records]:
-                 article_ids.append((ai_brief_record['id'],))
-                 
-            cursor.executemany("UPDATE articles SET synthesized = 1 WHERE id = ?", article_ids)
+            # One statement with one bound parameter for any number of ids (no 999-variable limit)
+            cursor.execute(
+                "UPDATE articles SET synthesized = 1 WHERE id IN (SELECT value FROM json_each(?))",
+                (json.dumps(article_ids),)
+            )
             
             conn.commit()
-            logger.info("Successfully generated and saved new Executive Summary and Audio.")
-            
-        except Exception as e:
-            logger.error(f"Failed to generate executive summary: {e}")
+        except BaseException:
             conn.rollback()
-            
+            raise
+    finally:
+        close_db(conn)
+
+
+async def synthesis_job_async(db_path: str = "articles.db"):
+    """
+    Reads processed articles, generates a synthesized report,
+    and saves it to the executive_summaries table.
+    Blocking SQLite and SDK calls run in worker threads, no database connection is held open
+    while the Gemini and TTS calls run, and only the final commit is serialized by _WRITE_LOCK.
+    """
+    # 1. Fetch the articles to synthesize
+    try:
+        pending = await asyncio.to_thread(_fetch_pending, db_path)
     except sqlite3.Error as db_err:
         logger.error(f"Database error occurred: {db_err}")
-    finally:
-        if 'conn' in locals() and conn:
-            conn.close()
+        return
+    if pending is None:
+        return
+    all_records, ai_brief_record = pending
+        
+    if not all_records and not ai_brief_record:
+        logger.info("No processed articles found to synthesize.")
+        return
+        
+    # Combine records: all unsynthesized non-AI-Daily-Brief ones, PLUS the single newest 24hr AI Daily Brief
+    llm_records = []
+    for record in all_records:
+        if record[1] != 'The AI Daily Brief':
+            llm_records.append(record)
+            
+    if ai_brief_record:
+        # Prevent duplicates if it happens to also be in all_records
+        if not any(record[0] == ai_brief_record[0] for record in llm_records):
+            llm_records.append(ai_brief_record)
+        
+    logger.info(f"Synthesizing {len(llm_records)} article summaries into an executive report...")
+    
+    # 2. Concatenate summaries for the text report, and raw text (compressed per article) for the
+    # script, streaming both in one pass over the rows instead of collecting per-row strings first
+    summaries_buf = io.StringIO()
+    raw_text_buf = io.StringIO()
+    separator = ""
+    for _, source, title, summary, raw_text in llm_records:
+        header = f"{separator}Source: {source}\nTitle: {title}\n"
+        summaries_buf.write(f"{header}Summary: {summary}")
+        raw_text_buf.write(f"{header}Content: {_compress_raw(title, raw_text)}")
+        separator = "\n\n"
+    aggregated_summaries = summaries_buf.getvalue()
+    aggregated_raw_text = raw_text_buf.getvalue()
+    
+    if not aggregated_summaries.strip():
+        logger.info("Aggregated text is empty. Skipping synthesis.")
+        return
+        
+    # 3. Call LLM to generate the Executive Summary and Podcast Script
+    try:
+        logger.info("Generating text Executive Summary and 3-minute Podcast (script from raw text, streamed into OpenAI TTS)...")
+        audio_file_path = f"podcast_{datetime.now().strftime('%Y%m%d_%H%M%S')}.mp3"
+        report_key = report_cache_key([(source, title, summary) for _, source, title, summary, _ in llm_records])
+        # A fresh async client per job (and so per event loop), closed with its connections when done
+        async with genai.Client(http_options=GEMINI_HTTP_OPTIONS).aio as client:
+            report_data = await generate_report_and_audio(
+                client, aggregated_summaries, report_key, aggregated_raw_text, audio_file_path, db_path
+            )
+        
+        # 4. Save everything to database, marking ALL fetched articles (even older excluded ones) as synthesized
+        article_ids = [record[0] for record in all_records]
+        if ai_brief_record and ai_brief_record[0] not in article_ids:
+            article_ids.append(ai_brief_record[0])
+        
+        async with _WRITE_LOCK:
+            await asyncio.to_thread(_commit_results, db_path, report_data, audio_file_path, article_ids)
+        logger.info("Successfully generated and saved new Executive Summary and Audio.")
+        
+    except Exception as e:
+        logger.error(f"Failed to generate executive summary: {e}")
+
+
+def synthesis_job(db_path: str = "articles.db"):
+    """
+    Synchronous entry point for the scheduler; runs synthesis_job_async to completion.
+    """
+    asyncio.run(synthesis_job_async(db_path))
 
 
 if __name__ == "__main__":
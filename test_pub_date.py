@@ -1,11 +1,31 @@
 import re
+import shelve
 import requests
+from requests.adapters import HTTPAdapter
+
+# Reused session (keep-alive) and pattern compiled once
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=4))
+_PUB_RE = re.compile(r'"publishDate":"([^"]+)"')
+
+# publishDate never changes once a video is out, so found dates are kept on disk across runs
+_CACHE_PATH = ".ytcache"
+
+def fetch_pub_date(vid):
+    with shelve.open(_CACHE_PATH) as cache:
+        if vid in cache:
+            return cache[vid]
+        html = _SESSION.get(f"https://www.youtube.com/watch?v={vid}", timeout=15).text
+        match = _PUB_RE.search(html)
+        if match:
+            cache[vid] = match.group(1)
+            return match.group(1)
+    return None
 
 def get_pub_date(vid):
-    html = requests.get(f"https://www.youtube.com/watch?v={vid}").text
-    match = re.search(r'"publishDate":"([^"]+)"', html)
-    if match:
-        print(f"publishDate for {vid}: {match.group(1)}")
+    pub_date = fetch_pub_date(vid)
+    if pub_date:
+        print(f"publishDate for {vid}: {pub_date}")
     else:
         print(f"publishDate not found for {vid}")
 
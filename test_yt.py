@@ -1,14 +1,24 @@
-import urllib.request
 import re
+import requests
+from requests.adapters import HTTPAdapter
 from youtube_transcript_api import YouTubeTranscriptApi
 
-html = urllib.request.urlopen('https://www.youtube.com/@AIDailyBrief/videos').read().decode('utf-8')
-video_ids = re.findall(r'"videoId":"([^"]+)"', html)
-vids = list(set(video_ids))
+# Reused session (keep-alive) and patterns compiled once
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=4))
+_VID_RE = re.compile(r'"videoId":"([^"]+)"')
+
+html = _SESSION.get('https://www.youtube.com/@AIDailyBrief/videos', timeout=15).text
+# Scan the ytInitialData script only (as ingestion does), falling back to the whole page
+start = html.find('var ytInitialData = ')
+end = html.find('</script>', start) if start != -1 else -1
+pos, endpos = (start, end) if start != -1 and end != -1 else (0, len(html))
+# Deduplicate, keeping page order (newest first)
+vids = list(dict.fromkeys(match.group(1) for match in _VID_RE.finditer(html, pos, endpos)))
 print(f"Found {len(vids)} videos.")
 
 if vids:
-    vid = vids[1]  # Pick a random recent one
+    vid = vids[1]  # Pick a recent one
     print(f"Testing video ID: {vid}")
     try:
         transcript = YouTubeTranscriptApi.get_transcript(vid)
@@ -0,0 +1,90 @@
+import sqlite3
+import time
+from unittest.mock import patch
+
+# Import from our application code
+import distillation
+
+
+def make_articles_db(path, ids):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE articles (id TEXT PRIMARY KEY, raw_text TEXT, summary TEXT, industry_tag TEXT, processed INTEGER DEFAULT 0)")
+    conn.executemany("INSERT INTO articles (id, raw_text) VALUES (?, 'text')", [(i,) for i in ids])
+    conn.commit()
+    conn.close()
+
+
+@patch('distillation.genai.Client')
+def test_distillation_job_releases_write_lock_between_llm_calls(mock_client, tmp_path, monkeypatch):
+    """Test that no write transaction is open while the job waits on Gemini, and every batch lands."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(distillation, 'COMMIT_BATCH_SIZE', 2)
+    db_path = str(tmp_path / "articles.db")
+    ids = [f"a{i}" for i in range(5)]
+    make_articles_db(db_path, ids)
+
+    def fake_updates(client, records):
+        for record in records:
+            # Stands in for a Gemini wait: another writer must get the lock without blocking
+            other = sqlite3.connect(db_path, timeout=0, isolation_level=None)
+            other.execute("BEGIN IMMEDIATE")
+            other.execute("COMMIT")
+            other.close()
+            yield "UPDATE articles SET summary = 's', processed = 1 WHERE id = ?", (record["id"],)
+
+    with patch('distillation.iter_article_updates', side_effect=fake_updates):
+        distillation.distillation_job(db_path)
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM articles WHERE processed = 1 AND summary = 's'").fetchone()[0] == 5
+    conn.close()
+
+
+def test_iter_article_updates_cancels_queued_calls_when_closed(monkeypatch):
+    """Test that closing the update generator early cancels Gemini calls that haven't started."""
+    calls = []
+
+    def fake_generate(client, text):
+        calls.append(text)
+        time.sleep(0.05)
+        return distillation.ArticleSummary(industry_tag="t", summary="s")
+
+    monkeypatch.setattr(distillation, 'generate_summary_and_category', fake_generate)
+    records = [{"id": f"a{i}", "raw_text": f"text {i}"} for i in range(40)]
+
+    updates = distillation.iter_article_updates(None, records)
+    next(updates)
+    updates.close()
+    time.sleep(0.2)
+
+    # At most the calls already running on the pool's workers when the generator was closed
+    assert len(calls) <= 2 * distillation.MAX_WORKERS
+
+
+@patch('distillation.genai.Client')
+def test_distillation_job_skips_only_the_failing_row_of_a_batch(mock_client, tmp_path, monkeypatch):
+    """Test that a failed batch commit falls back to per-row writes, keeping the good rows and the job going."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(distillation, 'COMMIT_BATCH_SIZE', 2)
+    db_path = str(tmp_path / "articles.db")
+    make_articles_db(db_path, [f"a{i}" for i in range(5)])
+    conn = sqlite3.connect(db_path)
+    # Rejects a summary for a1 only, as a stand-in for a row the database won't accept
+    conn.execute(
+        "CREATE TRIGGER reject_a1 BEFORE UPDATE ON articles WHEN NEW.id = 'a1' "
+        "BEGIN SELECT RAISE(ABORT, 'rejected'); END"
+    )
+    conn.commit()
+    conn.close()
+
+    def fake_updates(client, records):
+        for record in records:
+            yield "UPDATE articles SET summary = 's', processed = 1 WHERE id = ?", (record["id"],)
+
+    with patch('distillation.iter_article_updates', side_effect=fake_updates):
+        distillation.distillation_job(db_path)
+
+    conn = sqlite3.connect(db_path)
+    processed = conn.execute("SELECT id FROM articles WHERE processed = 1 ORDER BY id").fetchall()
+    conn.close()
+    assert processed == [("a0",), ("a2",), ("a3",), ("a4",)]
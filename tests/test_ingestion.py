@@ -5,13 +5,17 @@ import os
 from unittest.mock import patch, MagicMock
 from bs4 import BeautifulSoup
 
+# ingestion parses HTML with selectolax; skip this module rather than error where it isn't installed
+pytest.importorskip("selectolax")
+
 # Import from our application code
-from ingestion import extract_text_from_html, get_latest_youtube_videos
+import ingestion
+from ingestion import extract_text_from_html, get_latest_youtube_videos, existing_article_ids, fetch_url_content
 
 # --- Unit Tests for Ingestion Logic ---
 
 def test_extract_text_from_html():
-    """Test that BeautifulSoup properly strips out JS, CSS, and navigation elements."""
+    """Test that the selectolax extractor properly strips out JS, CSS, and navigation elements."""
     mock_html = '''
     <html>
         <head>
@@ -55,3 +59,75 @@ def test_get_latest_youtube_videos(mock_fetch):
     assert len(video_ids) == 2
     assert video_ids[0] == "TEST_VID_1"
     assert video_ids[1] == "TEST_VID_2"
+
+
+@patch('ingestion.fetch_url_content')
+def test_get_latest_youtube_videos_stops_after_five(mock_fetch):
+    """Test that only the first five unique IDs are returned, in page order."""
+    mock_fetch.return_value = ''.join(f'"videoId":"VID_{i % 7}",' for i in range(100))
+    
+    video_ids = get_latest_youtube_videos("https://fake_channel.com")
+    
+    assert video_ids == ["VID_0", "VID_1", "VID_2", "VID_3", "VID_4"]
+
+
+def test_existing_article_ids():
+    """Test that already-stored IDs are found with one batched lookup."""
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE articles (id TEXT PRIMARY KEY)")
+    conn.executemany("INSERT INTO articles (id) VALUES (?)", [("yt:A",), ("yt:B",)])
+    cursor = conn.cursor()
+    
+    assert existing_article_ids(cursor, ["yt:A", "yt:C", "yt:B"]) == {"yt:A", "yt:B"}
+    assert existing_article_ids(cursor, []) == set()
+    conn.close()
+
+
+@patch('ingestion.download_url_content')
+def test_fetch_url_content_uses_http_cache(mock_download, tmp_path, monkeypatch):
+    """Test that a second fetch of the same URL is served from the SQLite cache."""
+    monkeypatch.setattr(ingestion, 'DB_NAME', str(tmp_path / "articles.db"))
+    ingestion.setup_database()
+    mock_download.return_value = "<html>cached body</html>"
+    
+    assert fetch_url_content("https://example.com/a") == "<html>cached body</html>"
+    assert fetch_url_content("https://example.com/a") == "<html>cached body</html>"
+    assert mock_download.call_count == 1
+
+
+@patch('ingestion.SESSION.get')
+def test_download_url_content_rejects_non_html(mock_get):
+    """Test that a PDF response is rejected on its headers, without reading the body or retrying."""
+    response = mock_get.return_value.__enter__.return_value
+    response.headers = {'Content-Type': 'application/pdf'}
+    
+    with pytest.raises(ingestion.UnsupportedContentError):
+        ingestion.download_url_content("https://example.com/paper.pdf")
+    assert mock_get.call_count == 1
+    response.iter_content.assert_not_called()
+
+
+def test_extract_text_from_html_is_memoized():
+    """Test that identical HTML is parsed once, while pages with a shared prefix are not confused."""
+    header = '<html><head><title>Same site header</title></head><body>' + ('<div>menu</div>' * 500)
+    page_a = header + '<p>Article A</p></body></html>'
+    page_b = header + '<p>Article B</p></body></html>'
+    ingestion._TEXT_CACHE.clear()
+    
+    with patch('ingestion._parse_text_from_html', wraps=ingestion._parse_text_from_html) as mock_parse:
+        first = extract_text_from_html(page_a)
+        assert extract_text_from_html(page_a) == first
+        assert "Article B" in extract_text_from_html(page_b)
+    assert "Article A" in first
+    assert mock_parse.call_count == 2
+
+
+@patch('ingestion.fetch_url_content')
+def test_get_latest_youtube_videos_prefers_initial_data(mock_fetch):
+    """Test that IDs are read from the ytInitialData script, ignoring IDs elsewhere on the page."""
+    mock_fetch.return_value = (
+        '<script>var ytInitialPlayerResponse = {"videoId":"TRAILER"};</script>'
+        '<script>var ytInitialData = {"videoId":"VID_A","videoId":"VID_B"};</script>'
+    )
+    
+    assert get_latest_youtube_videos("https://fake_channel.com") == ["VID_A", "VID_B"]
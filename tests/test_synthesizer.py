@@ -0,0 +1,278 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import AsyncMock, MagicMock
+
+import httpx
+import pytest
+from google.genai import errors as genai_errors
+
+# Import from our application code
+import synthesizer
+from synthesizer import _compress_raw
+
+# --- Unit Tests for Synthesis Logic ---
+
+def test_compress_raw_passes_short_text_through():
+    """Test that text under budget (and missing text) is returned unchanged."""
+    assert _compress_raw("Title", "Short body. Two sentences.", max_chars=100) == "Short body. Two sentences."
+    assert _compress_raw("Title", None) is None
+
+
+def test_compress_raw_keeps_lede_and_relevant_sentences_in_order():
+    """Test that the lede is always kept and title-relevant sentences survive in document order."""
+    filler = " ".join(f"Filler sentence number {i} about the weather." for i in range(50))
+    raw = (
+        "The lede opens the story. "
+        f"{filler} "
+        "Nvidia announced a new GPU today. "
+        f"{filler} "
+        "The GPU from Nvidia ships next month."
+    )
+
+    compressed = _compress_raw("Nvidia unveils GPU", raw, max_chars=200)
+
+    assert len(compressed) <= 200
+    assert compressed.startswith("The lede opens the story.")
+    first = compressed.index("Nvidia announced a new GPU today.")
+    second = compressed.index("The GPU from Nvidia ships next month.")
+    assert first < second
+
+
+def test_compress_raw_windows_unpunctuated_captions():
+    """Test that captions without punctuation are scored in word windows rather than kept whole or dropped."""
+    words = [f"w{i}" for i in range(1000)]
+    words[500] = "openai"
+    raw = " ".join(words)
+
+    compressed = _compress_raw("OpenAI news", raw, max_chars=800)
+
+    assert 0 < len(compressed) <= 800
+    assert compressed.startswith("w0 w1 w2")
+    assert "openai" in compressed
+
+
+def test_compress_raw_handles_text_without_words():
+    """Test that an over-budget body with no words is truncated instead of raising."""
+    assert _compress_raw("Title", " " * 5000, max_chars=100) == " " * 100
+
+
+class FakeChunk:
+    def __init__(self, text):
+        self.text = text
+
+
+def fake_stream_client(chunks):
+    """A Gemini client whose aio.models.generate_content_stream yields the given text chunks."""
+    async def stream():
+        for text in chunks:
+            yield FakeChunk(text)
+
+    async def generate_content_stream(**kwargs):
+        return stream()
+
+    client = MagicMock()
+    client.models.generate_content_stream = generate_content_stream
+    return client
+
+
+def test_generate_podcast_groups_sentences_and_joins_audio_in_order(tmp_path, monkeypatch):
+    """Test that streamed sentences are grouped into TTS requests and their audio is written in script order."""
+    monkeypatch.setattr(synthesizer, 'TTS_CHUNK_CHARS', 25)
+    chunks = ["Welcome to the daily update. Today we", " cover models. Next up is", " hardware news! Thanks", " for listening"]
+    requests = []
+
+    def fake_speech(text, path):
+        requests.append(text)
+        # Earlier segments finish last, so the file order can't come from completion order
+        time.sleep(0.05 if text.startswith("Welcome") else 0)
+        with open(path, "wb") as segment:
+            segment.write(f"<{text}>".encode())
+
+    monkeypatch.setattr(synthesizer, 'save_speech', fake_speech)
+    audio_path = tmp_path / "podcast.mp3"
+
+    script = asyncio.run(synthesizer.generate_podcast(fake_stream_client(chunks), "raw", str(audio_path)))
+
+    assert script == "".join(chunks)
+    segments = [
+        "Welcome to the daily update.",  # long enough on its own
+        "Today we cover models. Next up is hardware news!",  # short sentence held for the next one
+        "Thanks for listening",  # tail flush, no terminal punctuation
+    ]
+    assert sorted(requests) == sorted(segments)
+    assert audio_path.read_bytes() == b"".join(f"<{text}>".encode() for text in segments)
+    assert list(tmp_path.iterdir()) == [audio_path]  # segments and scratch directory cleaned up
+
+
+def test_generate_podcast_leaves_no_file_when_tts_fails(tmp_path, monkeypatch):
+    """Test that a failed TTS segment propagates without retrying and leaves no partial MP3 behind."""
+    monkeypatch.setattr(synthesizer, 'TTS_CHUNK_CHARS', 10)
+    calls = []
+
+    def fake_speech(text, path):
+        calls.append(text)
+        with open(path, "wb") as segment:
+            segment.write(b"audio")
+            if text.startswith("Second"):
+                raise ValueError("TTS stream failed mid-segment")
+
+    monkeypatch.setattr(synthesizer, 'save_speech', fake_speech)
+    audio_path = tmp_path / "podcast.mp3"
+    client = fake_stream_client(["First sentence here. Second sentence here. Third sentence here."])
+
+    with pytest.raises(ValueError):
+        asyncio.run(synthesizer.generate_podcast(client, "raw", str(audio_path)))
+
+    assert len(calls) == 3
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_generate_podcast_rejects_empty_script(tmp_path):
+    """Test that a stream with no text raises EmptyResponseError instead of writing an empty file."""
+    with pytest.raises(synthesizer.EmptyResponseError):
+        asyncio.run(synthesizer.generate_podcast(fake_stream_client(["", ""]), "raw", str(tmp_path / "p.mp3")))
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_report_cache_key_ignores_order_and_whitespace():
+    """Test that permuted or reflowed article records share a key, while a different article set does not."""
+    records = [
+        ("TechCrunch", "Model launch", "A new model shipped.\n\nSource: a quote inside the summary"),
+        ("The AI Daily Brief", "Episode 12", "Topics covered today."),
+    ]
+    reflowed = [
+        ("The AI Daily Brief", "Episode 12", "Topics   covered\ntoday."),
+        ("TechCrunch", " Model launch", "A new model shipped. Source: a quote inside the summary"),
+    ]
+    different = records[:1] + [("The AI Daily Brief", "Episode 13", "Topics covered today.")]
+
+    key = synthesizer.report_cache_key(records)
+    assert synthesizer.report_cache_key(reflowed) == key
+    assert synthesizer.report_cache_key(different) != key
+    assert synthesizer.report_cache_key(records[:1]) != key
+
+
+def gemini_error(code, details=None):
+    """A google-genai APIError as the SDK raises it for an HTTP error response."""
+    error = {"error": {"code": code, "status": "STATUS", "message": "error"}}
+    if details:
+        error["error"]["details"] = details
+    return genai_errors.APIError(code, error)
+
+
+def test_is_transient_retries_rate_limits_and_network_errors_only():
+    """Test that 429/5xx and transport errors are retried while client errors and empty responses fail fast."""
+    assert synthesizer._is_transient(gemini_error(429))
+    assert synthesizer._is_transient(gemini_error(503))
+    assert synthesizer._is_transient(httpx.ConnectError("connection refused"))
+    assert not synthesizer._is_transient(gemini_error(400))
+    assert not synthesizer._is_transient(synthesizer.EmptyResponseError("no parsed response"))
+
+
+def test_retry_after_seconds_reads_gemini_retry_info():
+    """Test that a 429's RetryInfo retryDelay is used, and errors without one fall back to backoff (None)."""
+    retry_info = [{"@type": "type.googleapis.com/google.rpc.RetryInfo", "retryDelay": "37s"}]
+
+    assert synthesizer._retry_after_seconds(gemini_error(429, retry_info)) == 37.0
+    assert synthesizer._retry_after_seconds(gemini_error(503)) is None
+
+
+def test_generate_executive_report_fails_fast_on_non_transient_errors():
+    """Test that a 400 or an empty parsed response is raised on the first attempt, without retrying."""
+    client = MagicMock()
+    client.models.generate_content = AsyncMock(side_effect=gemini_error(400))
+    with pytest.raises(genai_errors.APIError):
+        asyncio.run(synthesizer.generate_executive_report(client, "summaries"))
+    assert client.models.generate_content.call_count == 1
+
+    client.models.generate_content = AsyncMock(return_value=MagicMock(parsed=None))
+    with pytest.raises(synthesizer.EmptyResponseError):
+        asyncio.run(synthesizer.generate_executive_report(client, "summaries"))
+    assert client.models.generate_content.call_count == 1
+
+
+def test_generate_executive_report_waits_retry_delay_on_429(monkeypatch):
+    """Test that a 429 is retried after the server's RetryInfo delay rather than the default backoff."""
+    sleeps = []
+
+    async def fake_sleep(seconds):
+        sleeps.append(seconds)
+
+    monkeypatch.setattr(synthesizer.generate_executive_report.retry, 'sleep', fake_sleep)
+    retry_info = [{"@type": "type.googleapis.com/google.rpc.RetryInfo", "retryDelay": "37s"}]
+    client = MagicMock()
+    client.models.generate_content = AsyncMock(side_effect=[gemini_error(429, retry_info), MagicMock(parsed="report")])
+
+    assert asyncio.run(synthesizer.generate_executive_report(client, "summaries")) == "report"
+    assert sleeps == [37.0]
+
+
+class FakeGeminiHandler(BaseHTTPRequestHandler):
+    """Answers generateContent with a JSON report and streamGenerateContent with an SSE script."""
+
+    # Keep-alive, so the client pools its connections as it does against the real API
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if ':streamGenerateContent' in self.path:
+            body = "".join(
+                "data: " + json.dumps({"candidates": [{"content": {"role": "model", "parts": [{"text": text}]}}]}) + "\r\n\r\n"
+                for text in ("Welcome to the update. ", "That is all for today.")
+            ).encode()
+            content_type = "text/event-stream"
+        else:
+            report = {"whats_new_today": "* new", "daily_brief_summary": "* brief", "key_takeaways": "* takeaway"}
+            body = json.dumps({"candidates": [{"content": {"role": "model", "parts": [{"text": json.dumps(report)}]}}]}).encode()
+            content_type = "application/json"
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def add_processed_articles(db_path, ids):
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS articles (id TEXT PRIMARY KEY, source TEXT, title TEXT, summary TEXT, raw_text TEXT, "
+        "published_at TIMESTAMP, processed INTEGER DEFAULT 0, synthesized INTEGER DEFAULT 0)"
+    )
+    conn.executemany(
+        "INSERT INTO articles (id, source, title, summary, raw_text, processed) VALUES (?, 'TechCrunch', ?, 'sum', 'body', 1)",
+        [(i, f"Title {i}") for i in ids],
+    )
+    conn.commit()
+    conn.close()
+
+
+def test_synthesis_job_runs_repeatedly_in_one_process(tmp_path, monkeypatch):
+    """Test that back-to-back jobs (each on a new event loop) all reach Gemini and save a report."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeGeminiHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+    monkeypatch.setattr(synthesizer, 'GEMINI_HTTP_OPTIONS', synthesizer.types.HttpOptions(
+        base_url=f"http://127.0.0.1:{server.server_port}/", timeout=10_000
+    ))
+    monkeypatch.setattr(synthesizer, 'save_speech', lambda text, path: open(path, "wb").close())
+    monkeypatch.chdir(tmp_path)
+    db_path = str(tmp_path / "articles.db")
+
+    try:
+        for run in range(3):
+            add_processed_articles(db_path, [f"run{run}"])
+            synthesizer.synthesis_job(db_path)
+    finally:
+        server.shutdown()
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM executive_summaries").fetchone()[0] == 3
+    assert conn.execute("SELECT COUNT(*) FROM articles WHERE synthesized = 0").fetchone()[0] == 0
+    conn.close()